@@ -1,50 +1,194 @@
+import argparse
 import os
+import mmap
 import platform
+import numpy as np
 import psutil
 import subprocess
 import speedtest
-from time import time
-import json
+from time import perf_counter, time
+import orjson
 import socket
+import struct
 import requests
+from concurrent.futures import ThreadPoolExecutor
+
+# Configuration
+HW_DEVICE = "/dev/dri/renderD128"  # VAAPI render node used when NVENC is unavailable
+HW_PROBE_TIMEOUT = 15  # Seconds allowed for each FFmpeg capability check at import
+SCALE_FLAGS = "fast_bilinear"  # swscale algorithm for the CPU path; pinned so runs are comparable
+DISK_BLOCK_SIZE = 1 << 20  # Bytes per write/read call in disk_io_test
+DISK_TEST_BLOCKS = 100  # Number of blocks written, i.e. a 100 MB test file
+NETWORK_TEST_URL = "http://speedtest.tele2.net/100MB.zip"  # Large enough to get past TCP slow-start
+NETWORK_TEST_BYTES = 100 * 1024 ** 2  # Size of the file at NETWORK_TEST_URL
+NETWORK_TEST_TIMEOUT = 120  # Seconds before the download test gives up
+
+_SESSION = None  # Shared requests.Session so repeated downloads reuse the connection
+
+# None of these change while the process is running, so gather them once at import
+_SYSINFO = {
+    "OS": platform.system(),
+    "OS Version": platform.version(),
+    "OS Release": platform.release(),
+    "Processor": platform.processor(),
+    "CPU Cores": psutil.cpu_count(logical=False),
+    "Logical CPUs": psutil.cpu_count(logical=True),
+    "Memory": f"{psutil.virtual_memory().total / (1024 ** 3):.2f} GB",
+}
+
+
+# Hardware Detection
+def encoder_works(encoder, setup=(), filters=None):
+    """Encode one synthetic frame to confirm an encoder runs on this machine."""
+    # Many stock FFmpeg builds list hardware encoders even when no GPU or driver is present
+    cmd = (["ffmpeg", "-v", "error"] + list(setup)
+           + ["-f", "lavfi", "-i", "nullsrc=s=256x256", "-frames:v", "1"]
+           + (["-vf", filters] if filters else [])
+           + ["-c:v", encoder, "-f", "null", "-"])
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                timeout=HW_PROBE_TIMEOUT)
+    except (FileNotFoundError, subprocess.TimeoutExpired):  # A hung driver counts as unavailable
+        return False
+    return result.returncode == 0
+
+
+def detect_hw_encoder():
+    """Pick the H.264 hardware encoder FFmpeg exposes on this machine, if any."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=HW_PROBE_TIMEOUT
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if "h264_nvenc" in result.stdout and encoder_works("h264_nvenc"):
+        return "h264_nvenc"
+    if ("h264_vaapi" in result.stdout and os.path.exists(HW_DEVICE)
+            and encoder_works("h264_vaapi", setup=["-vaapi_device", HW_DEVICE],
+                              filters="format=nv12,hwupload")):
+        return "h264_vaapi"
+    return None
+
+
+HW_ENCODER = detect_hw_encoder()
+
+
+def allowed_cpus():
+    """List the logical CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        return psutil.Process().cpu_affinity()
+    except AttributeError:  # macOS exposes no affinity API
+        return list(range(psutil.cpu_count(logical=True)))
+
+
+def one_cpu_per_core(cpus):
+    """Keep one logical CPU per physical core, using the Linux sysfs topology."""
+    chosen, seen = [], set()
+    for cpu in cpus:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                siblings = f.read().strip()
+        except OSError:
+            # Topology unknown (e.g. Windows numbers SMT siblings adjacently): keep every CPU
+            # and let the thread count alone limit x264
+            return list(cpus)
+        if siblings not in seen:
+            seen.add(siblings)
+            chosen.append(cpu)
+    return chosen
+
+
+def start_pinned(cmd, cpus):
+    """Start a command pinned to the given CPUs, discarding stdout and piping stderr."""
+    # Raw bytes on stderr: it is only decoded if the command fails
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # Pin right after exec (not via preexec_fn, which is unsafe with threads running in the
+    # parent); FFmpeg only starts its worker threads after probing the input, so they inherit it
+    try:
+        psutil.Process(proc.pid).cpu_affinity(list(cpus))
+    except (AttributeError, psutil.Error):
+        pass  # No affinity support (macOS) or the process already exited; run unpinned
+    return proc
+
+
+# One thread per physical core; left alone, x264 oversubscribes with ~1.5 threads per CPU
+FFMPEG_CPUS = one_cpu_per_core(allowed_cpus())
+FFMPEG_THREADS = min(len(FFMPEG_CPUS), psutil.cpu_count(logical=False) or len(FFMPEG_CPUS))
+
+
+def transcode_command(input_video, encoder):
+    """Build the FFmpeg command, keeping decoded frames on the GPU when possible."""
+    # Every path encodes to the null muxer ("-f null -") so file I/O stays out of the measurement,
+    # and logs only errors so stderr stays small
+    ffmpeg = ["ffmpeg", "-v", "error", "-nostats"]
+    if encoder == "h264_nvenc":
+        # -hwaccel cuda decodes on NVDEC without forcing a codec-specific cuvid decoder
+        return ffmpeg + ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda",
+                         "-i", input_video, "-vf", "scale_cuda=1280:720:format=nv12",
+                         "-c:v", "h264_nvenc", "-preset", "p4", "-tune", "ll", "-f", "null", "-"]
+    if encoder == "h264_vaapi":
+        return ffmpeg + ["-hwaccel", "vaapi", "-hwaccel_device", HW_DEVICE,
+                         "-hwaccel_output_format", "vaapi", "-i", input_video,
+                         "-vf", "scale_vaapi=w=1280:h=720:format=nv12",
+                         "-c:v", "h264_vaapi", "-f", "null", "-"]
+    # No hardware encoder: measure peak x264 throughput, though a hardware decoder may still help
+    threads = FFMPEG_THREADS
+    return ffmpeg + ["-hwaccel", "auto", "-i", input_video,
+                     "-vf", f"scale=1280:720:flags={SCALE_FLAGS}", "-pix_fmt", "nv12",
+                     "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+                     "-threads", str(threads),
+                     "-x264-params", f"threads={threads}:lookahead_threads={min(2, threads)}",
+                     "-f", "null", "-"]
 
 
 # Core Functions
+def _session():
+    """Return the shared requests.Session, creating it on first use."""
+    global _SESSION
+    if _SESSION is None:
+        _SESSION = requests.Session()
+    return _SESSION
+
+
 def get_system_info():
     """Gather basic system information."""
-    info = {
-        "OS": platform.system(),
-        "OS Version": platform.version(),
-        "OS Release": platform.release(),
-        "Processor": platform.processor(),
-        "CPU Cores": psutil.cpu_count(logical=False),
-        "Logical CPUs": psutil.cpu_count(logical=True),
-        "Memory": f"{psutil.virtual_memory().total / (1024 ** 3):.2f} GB",
+    return _SYSINFO.copy()
+
+
+def cpu_benchmark(ops=10**7, repeats=5):
+    """Perform a simple floating-point CPU benchmark."""
+    # Allocate outside the timed region so only the vectorized multiply is measured
+    a = np.full(ops, 3.14159)
+    b = np.full(ops, 2.71828)
+    out = np.empty_like(a)
+    # A single multiply takes only milliseconds, so use a high-resolution clock and keep the best run
+    elapsed_time = float("inf")
+    for _ in range(repeats):
+        start_time = perf_counter()
+        np.multiply(a, b, out=out)
+        elapsed_time = min(elapsed_time, perf_counter() - start_time)
+    gflops = ops / elapsed_time / 1e9
+    return {
+        f"CPU Benchmark ({ops // 10**6}M ops)": f"{elapsed_time:.4f} seconds",
+        "CPU Throughput": f"{gflops:.2f} GFLOPS",
     }
-    return info
-
-
-def cpu_benchmark():
-    """Perform a simple CPU benchmark."""
-    start_time = time()
-    for _ in range(10**7):
-        _ = 3.14159 * 2.71828
-    elapsed_time = time() - start_time
-    return {"CPU Benchmark (10M ops)": f"{elapsed_time:.2f} seconds"}
 
 
 def analyze_ffprobe(video_path):
     """Run ffprobe to extract video details."""
     try:
         result = subprocess.run(
-            ["ffprobe", "-v", "error", "-show_entries",
-             "format=duration:stream=codec_name,width,height,bit_rate", "-of", "json", video_path],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            ["ffprobe", "-v", "error", "-select_streams", "v:0", "-show_entries",
+             "format=duration,bit_rate:stream=codec_name,width,height", "-of", "json", video_path],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE
         )
         if result.returncode == 0:
-            return result.stdout  # JSON formatted video details
+            return result.stdout  # JSON formatted video details, as bytes for orjson
         else:
-            print(f"Error running ffprobe:\n{result.stderr}")
+            print(f"Error running ffprobe:\n{result.stderr.decode(errors='replace')}")
             return None
     except FileNotFoundError:
         print("Error: ffprobe is not installed or not in PATH.")
@@ -54,7 +198,7 @@ def analyze_ffprobe(video_path):
         return None
 
 
-def evaluate_transcoding(duration, elapsed_time, resolution):
+def evaluate_transcoding(duration, elapsed_time, resolution, encoder=None):
     """Evaluate the transcoding speed based on video properties."""
     real_time_ratio = elapsed_time / duration
     feedback = f"Transcoding completed in {elapsed_time:.2f} seconds.\n"
@@ -63,14 +207,17 @@ def evaluate_transcoding(duration, elapsed_time, resolution):
     if real_time_ratio <= 1.0:
         feedback += "Excellent speed (faster than real-time transcoding).\n"
     elif real_time_ratio <= 2.0:
-        feedback += "Good speed for CPU-based transcoding.\n"
+        feedback += f"Good speed for {'hardware' if encoder else 'CPU'}-based transcoding.\n"
+    elif encoder:
+        feedback += f"Slow speed even with hardware acceleration ({encoder}).\n"
     else:
         feedback += "Slow speed. Consider using hardware acceleration (e.g., NVENC).\n"
     
     if resolution[1] > 1080:
         feedback += "4K video transcoding is resource-intensive; consider upgrading hardware.\n"
     elif resolution[1] > 720:
-        feedback += "1080p video transcoding is reasonable but can benefit from GPU acceleration.\n"
+        feedback += "1080p video transcoding is reasonable"
+        feedback += ".\n" if encoder else " but can benefit from GPU acceleration.\n"
     else:
         feedback += "720p or lower resolution is relatively lightweight for most systems.\n"
     
@@ -80,7 +227,6 @@ def evaluate_transcoding(duration, elapsed_time, resolution):
 def test_transcoding():
     """Test transcoding performance using FFmpeg."""
     sample_video = "/LOCATION/OF/sample.mp4"
-    output_video = "/LOCATION/OF/output.mp4"
 
     # Check if the input video exists
     if not os.path.exists(sample_video):
@@ -92,37 +238,48 @@ def test_transcoding():
     if not ffprobe_output:
         return {"Transcoding Test": "Failed to analyze video properties"}
     
-    # Parse ffprobe JSON
-    ffprobe_data = json.loads(ffprobe_output)
+    # Parse ffprobe JSON (only the first video stream was requested)
+    ffprobe_data = orjson.loads(ffprobe_output)
+    if not ffprobe_data.get("streams"):
+        return {"Transcoding Test": "No video stream found"}
     duration = float(ffprobe_data["format"]["duration"])
     width = int(ffprobe_data["streams"][0]["width"])
     height = int(ffprobe_data["streams"][0]["height"])
     codec_name = ffprobe_data["streams"][0]["codec_name"]
     bitrate = int(ffprobe_data["format"].get("bit_rate", 0)) / 1e6  # Convert to Mbps
 
-    print(f"Video Details:\n- Codec: {codec_name}\n- Resolution: {width}x{height}\n- Duration: {duration:.2f}s\n- Bitrate: {bitrate:.2f} Mbps")
-
     try:
-        print("Starting transcoding test...")
         start_time = time()
 
-        # Execute FFmpeg transcoding
-        result = subprocess.run(
-            ["ffmpeg", "-i", sample_video, "-vf", "scale=1280:720", "-preset", "fast", output_video],
-            stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-        )
+        # Execute FFmpeg transcoding; report the video details while it starts up
+        encoder = HW_ENCODER
+        proc = start_pinned(transcode_command(sample_video, encoder), FFMPEG_CPUS)
+        print(f"Video Details:\n- Codec: {codec_name}\n- Resolution: {width}x{height}\n- Duration: {duration:.2f}s\n- Bitrate: {bitrate:.2f} Mbps")
+        print(f"Transcoding test running using {encoder or 'libx264'}...")
+        _, stderr = proc.communicate()  # Drains stderr so FFmpeg never blocks on a full pipe
+        label = encoder or "libx264"
+
+        if proc.returncode != 0 and encoder:
+            # The GPU may not decode this input, and software-decoded frames can't feed the
+            # hardware scaler; rerun on the CPU so the test still produces a result
+            print(f"{encoder} failed:\n{stderr.decode(errors='replace')}Retrying with libx264...")
+            label = f"libx264 (fallback, {encoder} failed on this input)"
+            encoder = None
+            start_time = time()
+            proc = start_pinned(transcode_command(sample_video, encoder), FFMPEG_CPUS)
+            _, stderr = proc.communicate()
 
         elapsed_time = time() - start_time
 
-        if result.returncode == 0:
+        if proc.returncode == 0:
             # Successful transcoding
-            os.remove(output_video)  # Clean up the output file after the test
-            feedback = evaluate_transcoding(duration, elapsed_time, (width, height))
+            feedback = f"Encoder: {label}\n"
+            feedback += evaluate_transcoding(duration, elapsed_time, (width, height), encoder)
             print(feedback)
             return {"Transcoding Test": feedback}
         else:
             # Handle FFmpeg error
-            print(f"FFmpeg error:\n{result.stderr}")
+            print(f"FFmpeg error:\n{stderr.decode(errors='replace')}")
             return {"Transcoding Test": "FFmpeg failed"}
 
     except FileNotFoundError:
@@ -135,57 +292,107 @@ def test_transcoding():
 
 
 def network_test_manual():
-    """Measure download speed manually using wget."""
+    """Measure download speed manually, preferring curl's native transfer loop."""
     import shutil
-    test_url = "http://speedtest.tele2.net/1MB.zip"  # Test file URL
-    test_file = "test_file.zip"
     try:
-        start_time = time()
-        with open(test_file, "wb") as f:
-            with requests.get(test_url, stream=True) as r:
-                shutil.copyfileobj(r.raw, f)
-        elapsed_time = time() - start_time
-        file_size_mb = 1  # 1MB test file
-        download_speed = file_size_mb / elapsed_time * 8  # Convert to Mbps
-        os.remove(test_file)
+        if shutil.which("curl"):
+            result = subprocess.run(
+                ["curl", "-sfL", "-o", os.devnull, "-H", "Accept-Encoding: identity",
+                 "--max-time", str(NETWORK_TEST_TIMEOUT), "-w", "%{size_download} %{speed_download}",
+                 NETWORK_TEST_URL],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
+            )
+            if result.returncode == 28:  # curl's "operation timed out" exit code
+                raise TimeoutError(f"Download did not finish within {NETWORK_TEST_TIMEOUT} seconds")
+            if result.returncode != 0:
+                raise RuntimeError(f"curl exited with code {result.returncode}")
+            downloaded, bytes_per_second = map(float, result.stdout.split())
+        else:
+            # Count the bytes as they arrive; writing them to disk would skew the result
+            downloaded = 0
+            start_time = time()
+            # timeout= bounds each connect/read; the loop check bounds the whole download
+            with _session().get(NETWORK_TEST_URL, stream=True, headers={"Accept-Encoding": "identity"},
+                                timeout=NETWORK_TEST_TIMEOUT) as r:
+                r.raise_for_status()
+                for chunk in r.iter_content(chunk_size=1 << 20):
+                    downloaded += len(chunk)
+                    if time() - start_time > NETWORK_TEST_TIMEOUT:
+                        raise TimeoutError(f"Download did not finish within {NETWORK_TEST_TIMEOUT} seconds")
+            bytes_per_second = downloaded / (time() - start_time)
+        # A redirect stub, captive portal page or cut-off body would otherwise be timed as the link
+        if downloaded < 0.9 * NETWORK_TEST_BYTES:
+            raise RuntimeError(f"Only {downloaded / 1024 ** 2:.2f} MB of the "
+                               f"{NETWORK_TEST_BYTES / 1024 ** 2:.0f} MB test file was downloaded")
+        download_speed = bytes_per_second * 8 / 1e6  # Convert to Mbps
         return {"Download Speed (Manual)": f"{download_speed:.2f} Mbps"}
     except Exception as e:
         return {"Network Test (Manual)": f"Failed - {str(e)}"}
 
 
-def disk_io_test():
+def _fadvise(fd, advice):
+    """Pass a page-cache hint to the kernel where posix_fadvise is available."""
+    if hasattr(os, "posix_fadvise"):
+        os.posix_fadvise(fd, 0, 0, getattr(os, advice))
+
+
+def disk_io_test(direct=False):
     """Measure disk read/write performance."""
     test_file = "disk_test.tmp"
+    # O_DIRECT skips the page cache entirely; it needs page-aligned buffers, which mmap provides
+    flags = getattr(os, "O_BINARY", 0) | (getattr(os, "O_DIRECT", 0) if direct else 0)
+    # Pull one block from the RNG up front and write it repeatedly: os.urandom can be slower
+    # than the disk, so generating data inside the timer would bias the write speed down.
+    # The file ends up as a repeated pattern rather than random data, which doesn't affect
+    # throughput on filesystems without transparent compression (the ext4/xfs/NTFS default).
+    buf = mmap.mmap(-1, DISK_BLOCK_SIZE)
+    buf.write(os.urandom(DISK_BLOCK_SIZE))
     try:
-        # Write test
-        start_time = time()
-        with open(test_file, "wb") as f:
-            f.write(os.urandom(100 * 1024 * 1024))
-        write_time = time() - start_time
+        # Write test (fsync so we time the disk, not page-cache insertion)
+        fd = os.open(test_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC | flags, 0o644)
+        with os.fdopen(fd, "wb", buffering=0) as f:
+            _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+            start_time = time()
+            for _ in range(DISK_TEST_BLOCKS):
+                f.write(buf)
+            os.fsync(fd)
+            write_time = time() - start_time
+            # Drop the file from the page cache so the read test has to hit the disk
+            _fadvise(fd, "POSIX_FADV_DONTNEED")
 
         # Read test
-        start_time = time()
-        with open(test_file, "rb") as f:
-            f.read()
-        read_time = time() - start_time
+        fd = os.open(test_file, os.O_RDONLY | flags)
+        with os.fdopen(fd, "rb", buffering=0) as f:
+            _fadvise(fd, "POSIX_FADV_SEQUENTIAL")
+            start_time = time()
+            while f.readinto(buf):
+                pass
+            read_time = time() - start_time
 
         os.remove(test_file)
+        size_mb = DISK_BLOCK_SIZE * DISK_TEST_BLOCKS / (1024 ** 2)
         return {
-            "Disk Write Speed": f"{100 / write_time:.2f} MB/s",
-            "Disk Read Speed": f"{100 / read_time:.2f} MB/s"
+            "Disk Write Speed": f"{size_mb / write_time:.2f} MB/s",
+            "Disk Read Speed": f"{size_mb / read_time:.2f} MB/s"
         }
     except Exception as e:
         return {"Disk I/O Test": f"Failed - {str(e)}"}
+    finally:
+        buf.close()
 
 
 def generate_report():
     """Run all tests and generate a comprehensive report."""
-    report = {}
-    report["System Information"] = get_system_info()
-    report.update(cpu_benchmark())
-    report.update(test_transcoding())
-    report.update(network_test_manual())
-    report.update(disk_io_test())
+    # The network test mostly waits on the wire, so overlap it with the local tests.
+    # The CPU, transcoding and disk tests stay sequential so they don't skew each other.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        network = executor.submit(network_test_manual)
+        cpu = cpu_benchmark()
+        transcoding = test_transcoding()
+        disk = disk_io_test()
+        report = {"System Information": get_system_info()}
+        for result in (cpu, transcoding, network.result(), disk):
+            report.update(result)
     return report
 
 
@@ -207,8 +414,9 @@ def server(host="0.0.0.0", port=5000):
             if request == "RUN_TESTS":
                 print("Running tests...")
                 report = generate_report()
-                # Send report to client
-                client_socket.send(json.dumps(report).encode("utf-8"))
+                # Send report to client, prefixed with its length so large reports arrive intact
+                payload = orjson.dumps(report, option=orjson.OPT_SERIALIZE_NUMPY)
+                client_socket.sendall(struct.pack(">I", len(payload)) + payload)
         except Exception as e:
             print(f"Error: {e}")
         finally:
@@ -216,6 +424,19 @@ def server(host="0.0.0.0", port=5000):
 
 
 # Client Function
+def recv_exact(sock, size):
+    """Read exactly size bytes from a socket into a preallocated buffer."""
+    data = bytearray(size)
+    view = memoryview(data)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:], min(size - received, 1 << 16))
+        if not count:
+            raise ConnectionError("Connection closed before the full report was received")
+        received += count
+    return data
+
+
 def client(server_host, server_port):
     """Connect to the server and request tests."""
     client_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
@@ -224,9 +445,9 @@ def client(server_host, server_port):
         client_socket.send("RUN_TESTS".encode("utf-8"))
         
         # Receive and print report
-        response = client_socket.recv(1024 * 10).decode("utf-8")
-        report = json.loads(response)
-        print(json.dumps(report, indent=4))
+        (length,) = struct.unpack(">I", recv_exact(client_socket, 4))
+        report = orjson.loads(recv_exact(client_socket, length))
+        print(orjson.dumps(report, option=orjson.OPT_INDENT_2).decode())
     except Exception as e:
         print(f"Error: {e}")
     finally:
@@ -235,19 +456,18 @@ def client(server_host, server_port):
 
 # Entry Point
 if __name__ == "__main__":
-    mode = input("Choose mode (report/server/client): ").strip().lower()
-
-    if mode == "report":
+    parser = argparse.ArgumentParser(description="Benchmark CPU, transcoding, network and disk performance.")
+    parser.add_argument("--mode", choices=["report", "server", "client"], default="report",
+                        help="run the tests locally, serve them over TCP, or request them from a server")
+    parser.add_argument("--host", help="address to bind (server, default 0.0.0.0) or connect to (client, default localhost)")
+    parser.add_argument("--port", type=int, default=5000, help="server port (default 5000)")
+    args = parser.parse_args()
+
+    if args.mode == "report":
         print("Generating report...")
         report = generate_report()
-        print(json.dumps(report, indent=4))
-    elif mode == "server":
-        server_host = input("Enter server host (default 0.0.0.0): ") or "0.0.0.0"
-        server_port = int(input("Enter server port (default 5000): ") or "5000")
-        server(server_host, server_port)
-    elif mode == "client":
-        server_host = input("Enter server host (default localhost): ") or "localhost"
-        server_port = int(input("Enter server port (default 5000): ") or "5000")
-        client(server_host, server_port)
+        print(orjson.dumps(report, option=orjson.OPT_INDENT_2 | orjson.OPT_SERIALIZE_NUMPY).decode())
+    elif args.mode == "server":
+        server(args.host or "0.0.0.0", args.port)
     else:
-        print("Invalid mode. Please choose 'report', 'server', or 'client'.")
+        client(args.host or "localhost", args.port)
@@ -1,42 +1,179 @@
+import argparse
 import os
 import platform
 import psutil
 import subprocess
 import requests
-from time import time
+from time import sleep, time
 import json
-import threading
+from concurrent.futures import ThreadPoolExecutor
 from plexapi.server import PlexServer
 
 # Configuration
 PLEX_URL = "http://localhost:32400"  # Change to your Plex server URL
 PLEX_TOKEN = "YOUR_TOKEN_HERE"  # Provided Plex token
 SAMPLE_VIDEO = "/DESTINATION/sample.mp4"  # Path to the sample video
+MAX_STREAM_WORKERS = 32  # Upper bound on threads used to fire stream requests
+HW_DEVICE = "/dev/dri/renderD128"  # VAAPI render node used when NVENC is unavailable
+HW_PROBE_TIMEOUT = 15  # Seconds allowed for each FFmpeg capability check at import
+SCALE_FLAGS = "fast_bilinear"  # swscale algorithm for the CPU path; pinned so runs are comparable
+
+_PLEX = None  # Shared PlexServer connection, created on first use by _plex()
+
+# None of these change while the process is running, so gather them once at import
+_SYSINFO = {
+    "OS": platform.system(),
+    "OS Version": platform.version(),
+    "OS Release": platform.release(),
+    "Processor": platform.processor(),
+    "CPU Cores": psutil.cpu_count(logical=False),
+    "Logical CPUs": psutil.cpu_count(logical=True),
+    "Memory": f"{psutil.virtual_memory().total / (1024 ** 3):.2f} GB",
+}
+
+
+# Hardware Detection
+def encoder_works(encoder, setup=(), filters=None):
+    """Encode one synthetic frame to confirm an encoder runs on this machine."""
+    # Many stock FFmpeg builds list hardware encoders even when no GPU or driver is present
+    cmd = (["ffmpeg", "-v", "error"] + list(setup)
+           + ["-f", "lavfi", "-i", "nullsrc=s=256x256", "-frames:v", "1"]
+           + (["-vf", filters] if filters else [])
+           + ["-c:v", encoder, "-f", "null", "-"])
+    try:
+        result = subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                                timeout=HW_PROBE_TIMEOUT)
+    except (FileNotFoundError, subprocess.TimeoutExpired):  # A hung driver counts as unavailable
+        return False
+    return result.returncode == 0
+
+
+def detect_hw_encoder():
+    """Pick the H.264 hardware encoder FFmpeg exposes on this machine, if any."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, timeout=HW_PROBE_TIMEOUT
+        )
+    except (FileNotFoundError, subprocess.TimeoutExpired):
+        return None
+    if "h264_nvenc" in result.stdout and encoder_works("h264_nvenc"):
+        return "h264_nvenc"
+    if ("h264_vaapi" in result.stdout and os.path.exists(HW_DEVICE)
+            and encoder_works("h264_vaapi", setup=["-vaapi_device", HW_DEVICE],
+                              filters="format=nv12,hwupload")):
+        return "h264_vaapi"
+    return None
+
+
+HW_ENCODER = detect_hw_encoder()
+
+
+def allowed_cpus():
+    """List the logical CPUs this process is allowed to run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    try:
+        return psutil.Process().cpu_affinity()
+    except AttributeError:  # macOS exposes no affinity API
+        return list(range(psutil.cpu_count(logical=True)))
+
+
+def one_cpu_per_core(cpus):
+    """Keep one logical CPU per physical core, using the Linux sysfs topology."""
+    chosen, seen = [], set()
+    for cpu in cpus:
+        try:
+            with open(f"/sys/devices/system/cpu/cpu{cpu}/topology/thread_siblings_list") as f:
+                siblings = f.read().strip()
+        except OSError:
+            # Topology unknown (e.g. Windows numbers SMT siblings adjacently): keep every CPU
+            # and let the thread count alone limit x264
+            return list(cpus)
+        if siblings not in seen:
+            seen.add(siblings)
+            chosen.append(cpu)
+    return chosen
+
+
+def start_pinned(cmd, cpus):
+    """Start a command pinned to the given CPUs, discarding stdout and piping stderr."""
+    # Raw bytes on stderr: it is only decoded if the command fails
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    # Pin right after exec (not via preexec_fn, which is unsafe with threads running in the
+    # parent); FFmpeg only starts its worker threads after probing the input, so they inherit it
+    try:
+        psutil.Process(proc.pid).cpu_affinity(list(cpus))
+    except (AttributeError, psutil.Error):
+        pass  # No affinity support (macOS) or the process already exited; run unpinned
+    return proc
+
+
+# Where monitor_system_metrics can pin itself, reserve a core for it and give FFmpeg one thread
+# per remaining physical core, so the monitor doesn't steal time from the process being measured
+_CPUS = one_cpu_per_core(allowed_cpus())
+_PHYSICAL_CORES = psutil.cpu_count(logical=False) or len(_CPUS)
+if hasattr(os, "sched_setaffinity") and len(_CPUS) > 1:
+    MONITOR_CPU, FFMPEG_CPUS = _CPUS[0], _CPUS[1:]
+    FFMPEG_THREADS = max(1, min(len(FFMPEG_CPUS), _PHYSICAL_CORES - 1))
+else:
+    MONITOR_CPU, FFMPEG_CPUS = None, _CPUS
+    FFMPEG_THREADS = min(len(FFMPEG_CPUS), _PHYSICAL_CORES)
+
+
+def transcode_command(input_video, encoder):
+    """Build the FFmpeg command, keeping decoded frames on the GPU when possible."""
+    # Every path encodes to the null muxer ("-f null -") so file I/O stays out of the measurement,
+    # and logs only errors so stderr stays small
+    ffmpeg = ["ffmpeg", "-v", "error", "-nostats"]
+    if encoder == "h264_nvenc":
+        # -hwaccel cuda decodes on NVDEC without needing the input codec up front
+        return ffmpeg + ["-hwaccel", "cuda", "-hwaccel_output_format", "cuda",
+                         "-i", input_video, "-vf", "scale_cuda=1280:720:format=nv12",
+                         "-c:v", "h264_nvenc", "-preset", "p4", "-tune", "ll", "-f", "null", "-"]
+    if encoder == "h264_vaapi":
+        return ffmpeg + ["-hwaccel", "vaapi", "-hwaccel_device", HW_DEVICE,
+                         "-hwaccel_output_format", "vaapi", "-i", input_video,
+                         "-vf", "scale_vaapi=w=1280:h=720:format=nv12",
+                         "-c:v", "h264_vaapi", "-f", "null", "-"]
+    # No hardware encoder: measure peak x264 throughput, though a hardware decoder may still help
+    threads = FFMPEG_THREADS
+    return ffmpeg + ["-hwaccel", "auto", "-i", input_video,
+                     "-vf", f"scale=1280:720:flags={SCALE_FLAGS}", "-pix_fmt", "nv12",
+                     "-c:v", "libx264", "-preset", "ultrafast", "-tune", "zerolatency",
+                     "-threads", str(threads),
+                     "-x264-params", f"threads={threads}:lookahead_threads={min(2, threads)}",
+                     "-f", "null", "-"]
 
 
 # Core Functions
+def _plex():
+    """Return the shared PlexServer, connecting on first use."""
+    global _PLEX
+    if _PLEX is None:
+        _PLEX = PlexServer(PLEX_URL, PLEX_TOKEN)
+    return _PLEX
+
+
 def get_system_info():
     """Gather basic system information."""
-    info = {
-        "OS": platform.system(),
-        "OS Version": platform.version(),
-        "OS Release": platform.release(),
-        "Processor": platform.processor(),
-        "CPU Cores": psutil.cpu_count(logical=False),
-        "Logical CPUs": psutil.cpu_count(logical=True),
-        "Memory": f"{psutil.virtual_memory().total / (1024 ** 3):.2f} GB",
-    }
-    return info
-
-
-def monitor_system_metrics(duration=60):
+    return _SYSINFO.copy()
+
+
+def monitor_system_metrics(duration=60, sample_period=1.0, cpu=None):
     """Monitor CPU, memory, and disk usage over a given duration."""
+    if cpu is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, {cpu})  # On Linux this pins only the calling thread
     metrics = []
+    psutil.cpu_percent(interval=None, percpu=True)  # Prime the counters; the first reading is meaningless
     end_time = time() + duration
     while time() < end_time:
+        sleep(sample_period)
+        per_core = psutil.cpu_percent(interval=None, percpu=True)  # Delta since the previous call
         metrics.append({
             "timestamp": time(),
-            "cpu_percent": psutil.cpu_percent(interval=1),
+            "cpu_percent": round(sum(per_core) / len(per_core), 1),
+            "cpu_percent_per_core": per_core,
             "memory_percent": psutil.virtual_memory().percent,
             "disk_usage_percent": psutil.disk_usage('/').percent,
         })
@@ -45,7 +182,7 @@ def monitor_system_metrics(duration=60):
 
 def simulate_concurrent_streams(stream_count=5):
     """Simulate multiple concurrent streams using the Plex API."""
-    plex = PlexServer(PLEX_URL, PLEX_TOKEN)
+    plex = _plex()
     # Extract the sample video title from the file name (remove extension)
     video_title = os.path.splitext(os.path.basename(SAMPLE_VIDEO))[0]
 
@@ -62,7 +199,6 @@ def simulate_concurrent_streams(stream_count=5):
     video = video_results[0]  # Get the first matching video object
 
     print(f"Starting {stream_count} concurrent streams for '{video.title}'...")
-    threads = []
 
     def play_stream(index):
         print(f"Stream {index + 1} started.")
@@ -72,20 +208,16 @@ def simulate_concurrent_streams(stream_count=5):
             print(f"Error in Stream {index + 1}: {e}")
         print(f"Stream {index + 1} ended.")
 
-    for i in range(stream_count):
-        thread = threading.Thread(target=play_stream, args=(i,))
-        threads.append(thread)
-        thread.start()
-
-    for thread in threads:
-        thread.join()
+    # A bounded pool gives back-pressure instead of one OS thread per stream
+    with ThreadPoolExecutor(max_workers=max(1, min(stream_count, MAX_STREAM_WORKERS))) as executor:
+        list(executor.map(play_stream, range(stream_count)))
 
     return {"Concurrent Streams": f"Simulated {stream_count} streams successfully"}
 
 
 def monitor_plex_transcoding():
     """Monitor Plex-specific metrics for active transcodes."""
-    plex = PlexServer(PLEX_URL, PLEX_TOKEN)
+    plex = _plex()
     sessions = plex.sessions()
     transcodes = []
     for session in sessions:
@@ -101,54 +233,65 @@ def monitor_plex_transcoding():
 
 def test_transcoding():
     """Test transcoding performance using FFmpeg."""
-    output_video = "/home/plex/Desktop/output.mp4"
-
     # Check if the input video exists
     if not os.path.exists(SAMPLE_VIDEO):
         print(f"Error: File not found: {SAMPLE_VIDEO}")
         return {"Transcoding Test": "Sample video not found"}
 
-    print(f"Starting transcoding test for '{SAMPLE_VIDEO}'...")
+    print(f"Starting transcoding test for '{SAMPLE_VIDEO}' using {HW_ENCODER or 'libx264'}...")
     start_time = time()
 
-    # Execute FFmpeg transcoding
-    result = subprocess.run(
-        ["ffmpeg", "-i", SAMPLE_VIDEO, "-vf", "scale=1280:720", "-preset", "fast", output_video],
-        stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True
-    )
+    # Execute FFmpeg transcoding; communicate() drains stderr so FFmpeg never blocks on a full pipe
+    proc = start_pinned(transcode_command(SAMPLE_VIDEO, HW_ENCODER), FFMPEG_CPUS)
+    _, stderr = proc.communicate()
+    label = HW_ENCODER or "libx264"
+
+    if proc.returncode != 0 and HW_ENCODER:
+        # The GPU may not decode this input, and software-decoded frames can't feed the
+        # hardware scaler; rerun on the CPU so the test still produces a result
+        print(f"{HW_ENCODER} failed:\n{stderr.decode(errors='replace')}Retrying with libx264...")
+        label = f"libx264 (fallback, {HW_ENCODER} failed on this input)"
+        start_time = time()
+        proc = start_pinned(transcode_command(SAMPLE_VIDEO, None), FFMPEG_CPUS)
+        _, stderr = proc.communicate()
 
     elapsed_time = time() - start_time
 
-    if result.returncode == 0:
+    if proc.returncode == 0:
         # Successful transcoding
-        os.remove(output_video)  # Clean up the output file after the test
-        return {"Transcoding Test": f"Transcoding completed in {elapsed_time:.2f} seconds"}
+        return {"Transcoding Test": f"Transcoding completed in {elapsed_time:.2f} seconds using {label}"}
     else:
         # Handle FFmpeg error
-        print(f"FFmpeg error:\n{result.stderr}")
+        print(f"FFmpeg error:\n{stderr.decode(errors='replace')}")
         return {"Transcoding Test": "FFmpeg failed"}
 
 
 def generate_report(stream_count=5, metrics_duration=60):
     """Run all tests and generate a comprehensive Plex stress test report."""
-    report = {}
-    report["System Information"] = get_system_info()
-    report["System Metrics"] = monitor_system_metrics(metrics_duration)
-    report["Concurrent Streams"] = simulate_concurrent_streams(stream_count)
-    report["Transcoding Test"] = test_transcoding()
-    report["Plex Transcoding Metrics"] = monitor_plex_transcoding()
-    return report
+    # Sample metrics in the background so they capture the load generated below
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        metrics = executor.submit(monitor_system_metrics, metrics_duration, cpu=MONITOR_CPU)
+        streams = simulate_concurrent_streams(stream_count)
+        transcoding = test_transcoding()
+        plex_transcodes = monitor_plex_transcoding()
+        return {
+            "System Information": get_system_info(),
+            "System Metrics": metrics.result(),
+            "Concurrent Streams": streams,
+            "Transcoding Test": transcoding,
+            "Plex Transcoding Metrics": plex_transcodes,
+        }
 
 
 # Entry Point
 if __name__ == "__main__":
-    mode = input("Choose mode (report): ").strip().lower()
-
-    if mode == "report":
-        stream_count = int(input("Enter number of concurrent streams: "))
-        metrics_duration = int(input("Enter metrics monitoring duration (seconds): "))
-        print(f"Generating Plex stress test report using sample video: {SAMPLE_VIDEO}...")
-        report = generate_report(stream_count, metrics_duration)
-        print(json.dumps(report, indent=4))
-    else:
-        print("Invalid mode. Please choose 'report'.")
+    parser = argparse.ArgumentParser(description="Stress test a Plex server with concurrent streams and transcodes.")
+    parser.add_argument("--mode", choices=["report"], default="report", help="only 'report' is supported")
+    parser.add_argument("--stream-count", type=int, default=5, help="number of concurrent streams (default 5)")
+    parser.add_argument("--metrics-duration", type=int, default=60,
+                        help="metrics monitoring duration in seconds (default 60)")
+    args = parser.parse_args()
+
+    print(f"Generating Plex stress test report using sample video: {SAMPLE_VIDEO}...")
+    report = generate_report(args.stream_count, args.metrics_duration)
+    print(json.dumps(report, indent=4))